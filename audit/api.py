@@ -2,6 +2,7 @@ from fastapi import APIRouter
 from collections import Counter
 from datetime import datetime
 from .utils import access_cache
+from .middleware import capture_stats
 
 audit_router = APIRouter(prefix="/api/audit", tags=["Audit"])
 
@@ -30,4 +31,9 @@ async def get_audit_log():
     logs = access_cache.get("orgsetup", [])
     # Sort logs by timestamp for consistent ordering
     sorted_logs = sorted(logs, key=lambda x: x["timestamp"])
-    return sorted_logs
\ No newline at end of file
+    return sorted_logs
+
+@audit_router.get("/capture-stats")
+async def get_capture_stats():
+    # Counters from AuditCaptureMiddleware; "dropped" > 0 means the queue was full
+    return capture_stats
@@ -0,0 +1,115 @@
+import asyncio
+import logging
+from datetime import datetime
+from typing import Callable, Dict, List, Optional
+from urllib.parse import parse_qs
+from .utils import access_cache
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Query parameter -> key used in the audit log (same names the UI filters use)
+AUDITED_FILTERS = {
+    "cycle": "cycle",
+    "org_log": "orgLog",
+    "org_cd": "orgCd",
+    "engmt_manager": "engmtManager",
+    "aco_analyst": "acoAnalyst",
+}
+
+# Oldest entries are dropped once the in-memory audit log grows past this.
+MAX_AUDIT_ENTRIES = 50000
+
+capture_stats: Dict[str, int] = {"captured": 0, "dropped": 0, "flushed": 0, "batches": 0}
+
+
+def normalize_filters(query_string: bytes) -> Dict[str, object]:
+    params = parse_qs(query_string.decode("latin-1"))
+    return {
+        key: sorted(set(params[param])) if params.get(param) else "null"
+        for param, key in AUDITED_FILTERS.items()
+    }
+
+
+class AuditCaptureMiddleware:
+    """Records every org-setup GET in ``access_cache["orgsetup"]`` off the request path.
+
+    The request only builds a small dict and puts it on a bounded queue; a
+    background task appends queued records in batches. When the queue is
+    full the record is dropped and counted, so auditing never slows a request.
+    """
+
+    def __init__(
+        self,
+        app,
+        path: str = "/api/org-setup",
+        user_header: str = "x-user-id",
+        queue_size: int = 10000,
+        batch_size: int = 500,
+        flush_interval: float = 1.0,
+        on_flush: Optional[Callable[[int], None]] = None,
+    ):
+        self.app = app
+        self.path = path.rstrip("/")
+        self.user_header = user_header.lower().encode("latin-1")
+        self.queue_size = queue_size
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.on_flush = on_flush
+        self._queue: Optional[asyncio.Queue] = None
+        self._flusher: Optional[asyncio.Task] = None
+
+    async def __call__(self, scope, receive, send):
+        # Only GETs are page loads; CORS preflights (OPTIONS) would count each one twice
+        if scope["type"] == "http" and scope["method"] == "GET" and scope["path"].rstrip("/") == self.path:
+            self._capture(scope)
+        await self.app(scope, receive, send)
+
+    def _capture(self, scope) -> None:
+        if self._queue is None:
+            self._queue = asyncio.Queue(maxsize=self.queue_size)
+        if self._flusher is None or self._flusher.done():
+            self._flusher = asyncio.create_task(self._flush_forever())
+
+        user_id = "anonymous"
+        for name, value in scope["headers"]:
+            if name == self.user_header:
+                user_id = value.decode("latin-1")
+                break
+        record = {
+            "user_id": user_id,
+            "filters": normalize_filters(scope.get("query_string", b"")),
+            "timestamp": datetime.now().replace(microsecond=0).isoformat(),
+        }
+        try:
+            self._queue.put_nowait(record)
+            capture_stats["captured"] += 1
+        except asyncio.QueueFull:
+            capture_stats["dropped"] += 1
+
+    async def _flush_forever(self) -> None:
+        while True:
+            batch: List[dict] = [await self._queue.get()]
+            # Give a partial batch time to fill up; a full one goes out at once.
+            if self._queue.qsize() < self.batch_size - 1:
+                await asyncio.sleep(self.flush_interval)
+            while len(batch) < self.batch_size and not self._queue.empty():
+                batch.append(self._queue.get_nowait())
+            try:
+                self._flush(batch)
+                if self.on_flush is not None:
+                    # Callbacks may do blocking I/O; keep it off the event loop
+                    await asyncio.to_thread(self.on_flush, capture_stats["flushed"])
+            except Exception as e:
+                logger.error(f"Failed to flush {len(batch)} audit records: {str(e)}")
+
+    def _flush(self, batch: List[dict]) -> None:
+        logs = access_cache.get("orgsetup")
+        if logs is None:
+            logs = []
+        logs.extend(batch)
+        if len(logs) > MAX_AUDIT_ENTRIES:
+            del logs[:-MAX_AUDIT_ENTRIES]
+        access_cache["orgsetup"] = logs
+        capture_stats["flushed"] += len(batch)
+        capture_stats["batches"] += 1
@@ -0,0 +1,60 @@
+"""Startup benchmark: time from process launch to the first healthy /health.
+
+Usage: python -m app.routers.bench_startup [--app app.main:app] [--runs 5]
+
+Each run starts uvicorn in a fresh process and polls /health until it
+answers 200, so imports, app construction and lifespan start-up are all
+included.
+"""
+import argparse
+import statistics
+import subprocess
+import sys
+import time
+import urllib.request
+
+
+def time_to_healthy(app: str, port: int, timeout: float = 60.0, factory: bool = False) -> float:
+    command = [sys.executable, "-m", "uvicorn", app, "--port", str(port), "--log-level", "warning"]
+    if factory:
+        command.append("--factory")
+    start = time.perf_counter()
+    process = subprocess.Popen(command)
+    try:
+        while time.perf_counter() - start < timeout:
+            if process.poll() is not None:
+                raise RuntimeError(f"uvicorn exited with code {process.returncode}")
+            try:
+                with urllib.request.urlopen(f"http://127.0.0.1:{port}/health", timeout=1) as response:
+                    if response.status == 200:
+                        return time.perf_counter() - start
+            except OSError:
+                time.sleep(0.01)
+        raise TimeoutError(f"/health did not answer within {timeout} s")
+    finally:
+        process.terminate()
+        process.wait()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--app", default="app.main:app")
+    parser.add_argument("--factory", action="store_true", help="treat --app as an app factory")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--port", type=int, default=8765)
+    args = parser.parse_args()
+
+    samples = []
+    for run in range(1, args.runs + 1):
+        seconds = time_to_healthy(args.app, args.port, factory=args.factory)
+        samples.append(seconds)
+        print(f"run {run}: {seconds * 1000:.0f} ms")
+    print(
+        f"time to first healthy /health over {len(samples)} runs: "
+        f"median {statistics.median(samples) * 1000:.0f} ms, "
+        f"min {min(samples) * 1000:.0f} ms, max {max(samples) * 1000:.0f} ms"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,277 @@
+import asyncio
+import logging
+import math
+import re
+from collections import Counter, defaultdict
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+from cachetools import LRUCache, TTLCache
+from fastapi import APIRouter, HTTPException, Query
+from .lazy import lazy_callable
+from ..services.org_setup_service import get_org_setup_files
+from . import snapshot
+from .tiered_cache import TieredCache
+
+execute_query = lazy_callable("..services.bigquery_service", "execute_query", __package__)
+
+chat_router = APIRouter(tags=["Chat"])
+
+# Set up logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# File types as get_org_setup_files names them, with the words users type for them. Bare
+# everyday words ("case", "cap", "claim") are left out; they match ordinary English.
+FILE_VOCABULARY: Dict[str, Tuple[str, ...]] = {
+    "Aetna Code": ("aetna code",),
+    "Attribution": ("attribution",),
+    "Capitation": ("capitation", "capitaton"),
+    "Claim Diagnosis Crosswalk": ("claim diagnosis crosswalk", "crosswalk", "xwalk"),
+    "Claims": ("claims",),
+    "Clinical Reporting Package": ("clinical reporting package", "crp"),
+    "Commercial Gaps in Care": ("commercial gaps in care", "gaps in care", "gic"),
+    "Delegation": ("delegation",),
+    "Enrollment / COE6": ("enrollment", "enroll", "coe6"),
+    "FAQs": ("faqs", "faq"),
+    "Lab Results": ("lab results", "lab", "labs"),
+    "Medical Case": ("medical case",),
+    "MORS-D": ("mors-d", "mors d"),
+    "MORS-E-G": ("mors-e-g", "mors e g", "mors-e"),
+    "MORS-J": ("mors-j", "mors j"),
+    "MORS-M": ("mors-m", "mors m"),
+    "MORS-L": ("mors-l", "mors l"),
+    "MA04": ("ma04",),
+    "Patient Profile / ENROLL07": ("patient profile", "enroll07"),
+    "Pharmacy": ("pharmacy", "rx"),
+    "Premium / MNR": ("premium", "mnr", "mmr"),
+    "Provider": ("provider", "providers"),
+}
+
+STOPWORDS = {
+    "a", "an", "the", "of", "for", "to", "in", "on", "and", "or", "is", "are", "do", "does",
+    "which", "what", "who", "how", "many", "orgs", "org", "organizations", "organization",
+    "get", "gets", "getting", "receive", "receives", "send", "sent", "files", "file", "with",
+    "without", "no", "that", "have", "has", "me", "show", "list", "all", "cycle",
+}
+
+# Row fields searched as free text
+TEXT_FIELDS = ("org_log", "org_cd", "file", "cadence", "refresh", "delimiter", "engmt_manager", "aco_analyst", "custom_logic")
+
+# Structured fields that questions can filter on exactly
+FILTER_FIELDS = ("cycle", "org_log", "org_cd", "file", "cadence", "refresh", "has_header", "engmt_manager", "aco_analyst")
+
+_TOKEN = re.compile(r"[a-z0-9]+(?:-[a-z0-9]+)*")
+
+
+def tokenize(text: str) -> List[str]:
+    return _TOKEN.findall(text.lower())
+
+
+def _norm(value: Any) -> str:
+    return " ".join(tokenize(str(value)))
+
+
+# (normalized synonym, file type), longest synonym first
+_FILE_SYNONYMS: List[Tuple[str, str]] = sorted(
+    ((_norm(synonym), file_name) for file_name, synonyms in FILE_VOCABULARY.items() for synonym in synonyms),
+    key=lambda item: -len(item[0]),
+)
+
+
+class InvertedIndex:
+    """BM25 index over flattened org-setup rows.
+
+    Every row is indexed twice: free-text tokens for ranking and exact
+    ``field=value`` terms for the filters a question maps onto.
+    """
+
+    k1 = 1.2
+    b = 0.75
+
+    def __init__(self, rows: List[Dict[str, Any]]):
+        self.rows = rows
+        self.postings: Dict[str, Dict[int, int]] = defaultdict(dict)
+        self.field_values: Dict[str, Dict[str, str]] = defaultdict(dict)
+        self.doc_lengths: List[int] = []
+        for doc_id, row in enumerate(rows):
+            tokens = [token for field in TEXT_FIELDS if row.get(field) for token in tokenize(str(row[field]))]
+            for token, tf in Counter(tokens).items():
+                self.postings[token][doc_id] = tf
+            self.doc_lengths.append(len(tokens))
+            for field in FILTER_FIELDS:
+                value = row.get(field)
+                if value in (None, ""):
+                    continue
+                normalized = _norm(value)
+                self.postings[f"{field}={normalized}"][doc_id] = 1
+                self.field_values[field].setdefault(normalized, str(value))
+        self.avg_length = sum(self.doc_lengths) / len(rows) if rows else 0.0
+
+    def matching(self, filters: Dict[str, Set[str]]) -> Set[int]:
+        """Rows matching every field, where a field matches any of its values."""
+        matched: Optional[Set[int]] = None
+        for field, values in filters.items():
+            docs: Set[int] = set()
+            for value in values:
+                docs.update(self.postings.get(f"{field}={value}", {}))
+            matched = docs if matched is None else matched & docs
+        return set(range(len(self.rows))) if matched is None else matched
+
+    def search(self, tokens: Iterable[str], candidates: Set[int]) -> List[Tuple[int, float]]:
+        scores: Dict[int, float] = dict.fromkeys(candidates, 0.0)
+        total = len(self.rows)
+        for token in set(tokens):
+            postings = self.postings.get(token)
+            if not postings:
+                continue
+            idf = math.log(1 + (total - len(postings) + 0.5) / (len(postings) + 0.5))
+            for doc_id, tf in postings.items():
+                if doc_id not in scores:
+                    continue
+                length_norm = 1 - self.b + self.b * self.doc_lengths[doc_id] / (self.avg_length or 1)
+                scores[doc_id] += idf * tf * (self.k1 + 1) / (tf + self.k1 * length_norm)
+        return sorted(scores.items(), key=lambda item: (-item[1], item[0]))
+
+
+def parse_intent(question: str, index: InvertedIndex) -> Tuple[Dict[str, Set[str]], List[str]]:
+    """Map a question onto index filters; returns the filters and leftover search tokens."""
+    text = " ".join(tokenize(question))
+    filters: Dict[str, Set[str]] = defaultdict(set)
+    consumed: Set[str] = {"header", "headers"}
+
+    def mentions(phrase: str) -> bool:
+        if re.search(rf"\b{re.escape(phrase)}\b", text):
+            consumed.update(phrase.split())
+            return True
+        return False
+
+    for cadence in ("daily", "weekly", "monthly"):
+        if mentions(cadence):
+            filters["cadence"].add(cadence)
+    for refresh in ("full", "incremental"):
+        if mentions(refresh):
+            filters["refresh"].add(refresh)
+    if mentions("without headers") or mentions("without header") or mentions("no headers") or mentions("no header"):
+        filters["has_header"].add("no")
+    elif mentions("headers") or mentions("header"):
+        filters["has_header"].add("yes")
+
+    # Longest synonym first, cutting each match out of the text, so "claim diagnosis
+    # crosswalk" is not also read as a shorter name inside it
+    unmatched = text
+    for synonym, file_name in _FILE_SYNONYMS:
+        pattern = rf"\b{re.escape(synonym)}\b"
+        if re.search(pattern, unmatched):
+            unmatched = re.sub(pattern, " | ", unmatched)
+            consumed.update(synonym.split())
+            filters["file"].add(_norm(file_name))
+    # Setups may spell a file differently from the vocabulary; keep the ones indexed
+    if "file" in filters:
+        known = set(index.field_values.get("file", {}))
+        spelled = {value for value in known if any(name in value or value in name for name in filters["file"])}
+        filters["file"] = spelled or filters["file"]
+
+    for cycle in re.findall(r"\b((?:19|20)\d{4})\b", text):
+        filters["cycle"].add(cycle)
+        consumed.add(cycle)
+
+    # Org codes, org logs and people are matched against the values seen in the index
+    for field in ("org_cd", "org_log", "engmt_manager", "aco_analyst"):
+        for normalized in index.field_values.get(field, {}):
+            if len(normalized) > 2 and mentions(normalized):
+                filters[field].add(normalized)
+
+    remaining = [token for token in text.split() if token not in STOPWORDS and token not in consumed]
+    return dict(filters), remaining
+
+
+def _describe(filters: Dict[str, Set[str]], index: InvertedIndex) -> str:
+    parts = []
+    for field in FILTER_FIELDS:
+        if field in filters:
+            shown = sorted(index.field_values.get(field, {}).get(value, value) for value in filters[field])
+            parts.append(f"{field.replace('_', ' ')} {' or '.join(shown)}")
+    return ", ".join(parts)
+
+
+def answer(question: str, index: InvertedIndex, max_orgs: int = 20) -> Dict[str, Any]:
+    filters, remaining = parse_intent(question, index)
+    candidates = index.matching(filters)
+    ranked = index.search(remaining, candidates)
+    if not filters:
+        ranked = [(doc_id, score) for doc_id, score in ranked if score > 0]
+
+    orgs: Dict[Tuple[Any, Any], float] = {}
+    for doc_id, score in ranked:
+        row = index.rows[doc_id]
+        key = (row.get("org_log"), row.get("org_cd"))
+        orgs[key] = max(orgs.get(key, 0.0), score)
+
+    described = _describe(filters, index) or "your question"
+    if not orgs:
+        response = f"No org setups match {described}."
+    else:
+        names = [f"{org_log} ({org_cd})" if org_cd else str(org_log) for org_log, org_cd in list(orgs)[:max_orgs]]
+        more = f" and {len(orgs) - max_orgs} more" if len(orgs) > max_orgs else ""
+        counted = "1 org matches" if len(orgs) == 1 else f"{len(orgs)} orgs match"
+        response = f"{counted} {described}: {', '.join(names)}{more}."
+    return {
+        "response": response,
+        "filters": {field: sorted(values) for field, values in filters.items()},
+        "matches": [index.rows[doc_id] for doc_id, _ in ranked[:max_orgs]],
+    }
+
+
+# Flattened rows per cycle survive restarts; closed cycles survive new cycles too
+row_cache = TieredCache("chat_rows", maxsize=4, ttl=86400)
+snapshot.on_cycle_change(row_cache.set_current_cycle)
+
+_indexes: LRUCache = LRUCache(maxsize=4)
+# Builds run one at a time in a worker thread; a question arriving mid-build
+# waits and then finds the index instead of building it again
+_index_lock = asyncio.Lock()
+
+# Answer cache: keyed by normalized question and snapshot version, TTL = 3600 seconds (1 hour)
+answer_cache = TTLCache(maxsize=1000, ttl=3600)
+
+
+def get_index(cycle: int) -> InvertedIndex:
+    rows = row_cache.get(cycle)
+    if rows is None:
+        query = f"SELECT * FROM `anbc-hcb-dev.vbc_dtxp_hcb_dev.vbc_parm_dtxp_hist_v` WHERE dx_cycle = {int(cycle)}"
+        rows = [file_info for record in execute_query(query) for file_info in get_org_setup_files(record)]
+        row_cache.set(cycle, rows, cycle=cycle)
+        logger.info(f"Fetched {len(rows)} org setup rows for cycle {cycle} and cached")
+    index = _indexes.get(cycle)
+    if index is None or index.rows is not rows:
+        index = InvertedIndex(rows)
+        _indexes[cycle] = index
+    return index
+
+
+@chat_router.get("/chat")
+async def chat(message: str = Query(..., min_length=1, max_length=500)):
+    """Answer questions about org setups from a local index; no external model is called."""
+    current = snapshot.current_cycle()
+    if current is None:
+        raise HTTPException(status_code=503, detail="Org setup data is not available yet")
+
+    question = " ".join(tokenize(message))
+    cache_key = (question, current)
+    if cache_key in answer_cache:
+        return {"data": answer_cache[cache_key]}
+
+    cycles = re.findall(r"\b((?:19|20)\d{4})\b", question)
+    cycle = int(cycles[0]) if len(cycles) == 1 else current
+    try:
+        async with _index_lock:
+            index = await asyncio.to_thread(get_index, cycle)
+    except Exception as e:
+        logger.error(f"Failed to build chat index: {str(e)}")
+        raise HTTPException(
+            status_code=500,
+            detail=f"Failed to build chat index: {str(e)}",
+        )
+
+    result = answer(message, index)
+    answer_cache[cache_key] = result
+    return {"data": result}
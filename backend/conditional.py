@@ -0,0 +1,123 @@
+import gzip
+import hashlib
+import json
+import threading
+from typing import Any, Dict, Optional
+from cachetools import LRUCache
+from fastapi import Request, Response
+
+try:
+    import orjson
+except ImportError:  # Optional: falls back to the stdlib encoder
+    orjson = None
+
+try:
+    import zstandard
+except ImportError:  # Optional: only gzip is offered without it
+    zstandard = None
+
+# Bodies below this size are sent as-is; compressing them costs more than it saves.
+MIN_COMPRESS_BYTES = 1024
+
+# Encoded bodies for the hottest ETags, one entry per encoding actually requested.
+# Callers put the data entry's stamp in the ETag, so a refreshed entry never
+# meets a body encoded from the old one.
+_body_cache: LRUCache = LRUCache(maxsize=256)
+_body_lock = threading.Lock()
+
+
+def make_etag(version: Any, signature: str) -> str:
+    """Weak ETag for a response built from snapshot ``version`` and ``signature``.
+
+    Weak because the same representation is served under several encodings.
+    """
+    digest = hashlib.blake2b(f"{version}|{signature}".encode(), digest_size=12).hexdigest()
+    return f'W/"{digest}"'
+
+
+def encode_json(content: Any) -> bytes:
+    """Serialize a pydantic model or plain data to JSON bytes as fast as available."""
+    if hasattr(content, "model_dump_json"):
+        return content.model_dump_json().encode()
+    if hasattr(content, "json"):
+        return content.json().encode()
+    if orjson is not None:
+        return orjson.dumps(content)
+    return json.dumps(content, separators=(",", ":")).encode()
+
+
+def _etag_matches(if_none_match: str, etag: str) -> bool:
+    if if_none_match.strip() == "*":
+        return True
+    opaque = etag.removeprefix("W/")
+    return any(tag.strip().removeprefix("W/") == opaque for tag in if_none_match.split(","))
+
+
+def _pick_encoding(accept_encoding: str) -> str:
+    offered = set()
+    for part in accept_encoding.split(","):
+        token, _, params = part.partition(";")
+        name, _, quality = params.strip().partition("=")
+        try:
+            if name.strip() == "q" and float(quality) == 0:
+                continue
+        except ValueError:
+            continue
+        offered.add(token.strip().lower())
+    if zstandard is not None and "zstd" in offered:
+        return "zstd"
+    if "gzip" in offered:
+        return "gzip"
+    return "identity"
+
+
+def _compress(body: bytes, encoding: str) -> bytes:
+    if encoding == "zstd":
+        return zstandard.ZstdCompressor(level=3).compress(body)
+    if encoding == "gzip":
+        return gzip.compress(body, compresslevel=6)
+    return body
+
+
+def _encoded_body(etag: str, encoding: str, content: Any = None) -> Optional[bytes]:
+    with _body_lock:
+        variants: Optional[Dict[str, bytes]] = _body_cache.get(etag)
+        if variants is None:
+            if content is None:
+                return None
+            variants = {"identity": encode_json(content)}
+            _body_cache[etag] = variants
+        if encoding not in variants:
+            variants[encoding] = _compress(variants["identity"], encoding)
+        return variants[encoding]
+
+
+def _response(request: Request, etag: str, content: Any = None) -> Optional[Response]:
+    encoding = _pick_encoding(request.headers.get("accept-encoding", ""))
+    identity = _encoded_body(etag, "identity", content)
+    if identity is None:
+        return None
+    if len(identity) < MIN_COMPRESS_BYTES:
+        encoding = "identity"
+    body = _encoded_body(etag, encoding)
+    headers = {"ETag": etag, "Cache-Control": "no-cache", "Vary": "Accept-Encoding"}
+    if encoding != "identity":
+        headers["Content-Encoding"] = encoding
+    return Response(content=body, media_type="application/json", headers=headers)
+
+
+def lookup(request: Request, etag: str) -> Optional[Response]:
+    """Answer a request from the ETag alone, or return None if it must be built.
+
+    Gives 304 when the client already has this version, and the stored body
+    when another client recently fetched it.
+    """
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match and _etag_matches(if_none_match, etag):
+        return Response(status_code=304, headers={"ETag": etag, "Vary": "Accept-Encoding"})
+    return _response(request, etag)
+
+
+def respond(request: Request, etag: str, content: Any) -> Response:
+    """Encode ``content`` once, keep it under ``etag`` and send it compressed if accepted."""
+    return _response(request, etag, content)
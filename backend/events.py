@@ -0,0 +1,300 @@
+import asyncio
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from collections import deque
+from typing import Any, AsyncIterator, Deque, Dict, List, Optional, Set, Tuple
+from fastapi import APIRouter, Header, Request
+from fastapi.responses import StreamingResponse
+from . import snapshot
+from .tiered_cache import CACHE_DIR, ensure_cache_dir
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+events_router = APIRouter(prefix="/api/events", tags=["Events"])
+
+# (event id, event type, JSON payload)
+Event = Tuple[int, str, str]
+
+POLL_INTERVAL = 0.5
+HEARTBEAT_INTERVAL = 15
+RETAINED_EVENTS = 1000
+CLIENT_QUEUE_SIZE = 100
+
+
+class LocalPubSub:
+    """In-process event log; enough when the app runs as a single worker."""
+
+    def __init__(self, retained: int = RETAINED_EVENTS):
+        self._events: Deque[Event] = deque(maxlen=retained)
+        self._versions: Dict[str, int] = {}
+        self._next_id = 1
+        self._lock = threading.Lock()
+
+    def publish(self, event_type: str, payload: str) -> None:
+        with self._lock:
+            self._events.append((self._next_id, event_type, payload))
+            self._next_id += 1
+
+    def publish_if_newer(self, event_type: str, payload: str, version: int) -> bool:
+        with self._lock:
+            stored = self._versions.get(event_type)
+            if stored is not None and version <= stored:
+                return False
+            self._versions[event_type] = version
+            if stored is None:
+                return False
+            self._events.append((self._next_id, event_type, payload))
+            self._next_id += 1
+            return True
+
+    def read_after(self, last_id: int) -> List[Event]:
+        with self._lock:
+            return [event for event in self._events if event[0] > last_id]
+
+    def latest_id(self) -> int:
+        with self._lock:
+            return self._next_id - 1
+
+
+class SQLitePubSub:
+    """Event log in a shared SQLite file so every worker on the host sees each event.
+
+    Several workers notice the same new cycle; ``publish_if_newer`` keeps
+    such events from being published once per worker. The last published
+    version lives in its own table, which is never purged with old events.
+    """
+
+    def __init__(self, path: str, retained: int = RETAINED_EVENTS):
+        self.path = path
+        self.retained = retained
+        self._lock = threading.Lock()
+        self._db: Optional[sqlite3.Connection] = None
+
+    def _connection(self) -> sqlite3.Connection:
+        # Opened on first publish or read so importing the router does no disk I/O
+        if self._db is None:
+            ensure_cache_dir(os.path.dirname(self.path))
+            db = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None, timeout=5)
+            db.execute("PRAGMA journal_mode=WAL")
+            db.executescript("""
+                CREATE TABLE IF NOT EXISTS events (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    type TEXT NOT NULL,
+                    payload TEXT NOT NULL,
+                    created_at REAL NOT NULL
+                );
+                CREATE TABLE IF NOT EXISTS versions (
+                    type TEXT PRIMARY KEY,
+                    version INTEGER NOT NULL
+                );
+            """)
+            self._db = db
+        return self._db
+
+    def publish(self, event_type: str, payload: str) -> None:
+        with self._lock:
+            self._insert(event_type, payload)
+
+    def publish_if_newer(self, event_type: str, payload: str, version: int) -> bool:
+        with self._lock:
+            db = self._connection()
+            db.execute("BEGIN IMMEDIATE")
+            try:
+                row = db.execute("SELECT version FROM versions WHERE type = ?", (event_type,)).fetchone()
+                if row is not None and version <= row[0]:
+                    db.execute("COMMIT")
+                    return False
+                db.execute("INSERT OR REPLACE INTO versions (type, version) VALUES (?, ?)", (event_type, version))
+                if row is not None:
+                    self._insert(event_type, payload)
+                db.execute("COMMIT")
+                return row is not None
+            except sqlite3.Error:
+                db.execute("ROLLBACK")
+                raise
+
+    def _insert(self, event_type: str, payload: str) -> None:
+        cursor = self._connection().execute(
+            "INSERT INTO events (type, payload, created_at) VALUES (?, ?, ?)",
+            (event_type, payload, time.time()),
+        )
+        if cursor.lastrowid % 100 == 0:
+            self._connection().execute("DELETE FROM events WHERE id <= ?", (cursor.lastrowid - self.retained,))
+
+    def read_after(self, last_id: int) -> List[Event]:
+        with self._lock:
+            return self._connection().execute(
+                "SELECT id, type, payload FROM events WHERE id > ? ORDER BY id", (last_id,)
+            ).fetchall()
+
+    def latest_id(self) -> int:
+        with self._lock:
+            row = self._connection().execute("SELECT MAX(id) FROM events").fetchone()
+            return row[0] or 0
+
+
+class FallbackPubSub:
+    """The shared SQLite event log, or an in-process one if its file cannot be opened.
+
+    The choice is made on first use, so importing the router still does no
+    disk I/O, and a broken cache directory costs one logged error, not one
+    per publish or poll.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._active = None
+        self._lock = threading.Lock()
+
+    def _pubsub(self):
+        with self._lock:
+            if self._active is None:
+                shared = SQLitePubSub(self.path)
+                try:
+                    shared._connection()
+                    self._active = shared
+                except (OSError, sqlite3.Error) as e:
+                    logger.error(f"Shared event log unavailable, events stay in this worker: {str(e)}")
+                    self._active = LocalPubSub()
+            return self._active
+
+    # The backend is resolved inside each call, so callers running these in a
+    # thread also open the file there
+    def publish(self, event_type: str, payload: str) -> None:
+        self._pubsub().publish(event_type, payload)
+
+    def publish_if_newer(self, event_type: str, payload: str, version: int) -> bool:
+        return self._pubsub().publish_if_newer(event_type, payload, version)
+
+    def read_after(self, last_id: int) -> List[Event]:
+        return self._pubsub().read_after(last_id)
+
+    def latest_id(self) -> int:
+        return self._pubsub().latest_id()
+
+
+def _default_pubsub():
+    if os.getenv("EVENTS_BACKEND", "sqlite") == "local":
+        return LocalPubSub()
+    return FallbackPubSub(os.path.join(CACHE_DIR, "events.sqlite3"))
+
+
+def _format(event: Event) -> bytes:
+    event_id, event_type, payload = event
+    return f"id: {event_id}\nevent: {event_type}\ndata: {payload}\n\n".encode()
+
+
+class EventBroker:
+    """Fans events out from one poller per worker to every connected client.
+
+    Each event is read and formatted once, then handed to the per-client
+    queues. A client that falls behind loses its oldest pending events rather
+    than slowing the others; it will refetch on the next event anyway.
+    """
+
+    def __init__(self, pubsub):
+        self.pubsub = pubsub
+        self._clients: Set[asyncio.Queue] = set()
+        self._task: Optional[asyncio.Task] = None
+
+    def publish(self, event_type: str, data: Dict[str, Any]) -> None:
+        try:
+            self.pubsub.publish(event_type, json.dumps(data, separators=(",", ":")))
+        except Exception as e:
+            logger.error(f"Failed to publish {event_type} event: {str(e)}")
+
+    def publish_if_newer(self, event_type: str, data: Dict[str, Any], version: int) -> None:
+        """Publish unless an event of this type with ``version`` or newer already was.
+
+        The first version ever recorded is stored without an event: there is
+        nothing older for clients to move on from.
+        """
+        try:
+            self.pubsub.publish_if_newer(event_type, json.dumps(data, separators=(",", ":")), version)
+        except Exception as e:
+            logger.error(f"Failed to publish {event_type} event: {str(e)}")
+
+    async def subscribe(self, last_event_id: Optional[int] = None) -> AsyncIterator[bytes]:
+        queue: asyncio.Queue = asyncio.Queue(maxsize=CLIENT_QUEUE_SIZE)
+        if last_event_id is not None:
+            try:
+                replay = await asyncio.to_thread(self.pubsub.read_after, last_event_id)
+                for event in replay[-CLIENT_QUEUE_SIZE:]:
+                    queue.put_nowait(_format(event))
+            except Exception as e:
+                logger.error(f"Failed to replay events after {last_event_id}: {str(e)}")
+        self._clients.add(queue)
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+        try:
+            while True:
+                try:
+                    yield await asyncio.wait_for(queue.get(), timeout=HEARTBEAT_INTERVAL)
+                except asyncio.TimeoutError:
+                    yield b": keep-alive\n\n"
+        finally:
+            self._clients.discard(queue)
+
+    async def _run(self) -> None:
+        try:
+            last_id = await asyncio.to_thread(self.pubsub.latest_id)
+        except Exception as e:
+            logger.error(f"Failed to read events: {str(e)}")
+            last_id = 0
+        while self._clients:
+            await asyncio.sleep(POLL_INTERVAL)
+            try:
+                # SQLite reads (and the lock publishers hold) stay off the event loop
+                events = await asyncio.to_thread(self.pubsub.read_after, last_id)
+            except Exception as e:
+                logger.error(f"Failed to read events: {str(e)}")
+                continue
+            for event in events:
+                last_id = event[0]
+                frame = _format(event)
+                for queue in list(self._clients):
+                    if queue.full():
+                        queue.get_nowait()
+                    queue.put_nowait(frame)
+
+
+broker = EventBroker(_default_pubsub())
+
+
+def publish(event_type: str, **data: Any) -> None:
+    """Broadcast an invalidation; ``version`` defaults to the current snapshot."""
+    if "version" not in data:
+        data["version"] = snapshot.current_cycle()
+    broker.publish(event_type, data)
+
+
+def _announce_cycle(cycle: int) -> None:
+    # Every check counts, including a process's first: a cycle that lands
+    # during a restart is still new to clients. The stored version keeps
+    # each cycle to one event across workers and restarts.
+    broker.publish_if_newer("cycle", {"version": cycle, "cycle": cycle}, version=cycle)
+
+
+snapshot.on_cycle_change(_announce_cycle)
+
+
+@events_router.get("/stream")
+async def stream_events(request: Request, last_event_id: Optional[int] = Header(None)):
+    """Server-sent events: ``cycle``, ``filters`` and ``audit`` invalidations."""
+
+    async def frames():
+        async for frame in broker.subscribe(last_event_id):
+            if await request.is_disconnected():
+                break
+            yield frame
+
+    return StreamingResponse(
+        frames(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
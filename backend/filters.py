@@ -1,9 +1,13 @@
-from fastapi import APIRouter, HTTPException
-from cachetools import TTLCache
+from fastapi import APIRouter, HTTPException, Request
+import asyncio
 import logging
 from typing import List
-from ..services.bigquery_service import execute_query
+from .lazy import lazy_callable
 from ..utils.status_codes import StatusCode  # Assuming this exists; adjust if not
+from . import conditional, events, snapshot
+from .tiered_cache import TieredCache
+
+execute_query = lazy_callable("..services.bigquery_service", "execute_query", __package__)
 
 filters_router = APIRouter(prefix="/api/filters", tags=["Filters"])
 
@@ -11,23 +15,35 @@ filters_router = APIRouter(prefix="/api/filters", tags=["Filters"])
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-# Cache: max 100 items, TTL = 86400 seconds (24 hours)
-local_cache = TTLCache(maxsize=100, ttl=86400)
+# Cache: max 100 items in memory backed by a disk store, TTL = 86400 seconds (24 hours).
+# snapshot.current_cycle() in each handler drops the lists once a new dx_cycle lands,
+# and each ETag carries the entry's stamp so a refreshed list gets a new one.
+local_cache = TieredCache("filters", maxsize=100, ttl=86400)
+snapshot.on_cycle_change(local_cache.set_current_cycle)
 
 @filters_router.get("/cycle")
-async def get_cycle_filters() -> List[int]:
+async def get_cycle_filters(request: Request) -> List[int]:
     cache_key = "cycle_filters"
-    if cache_key in local_cache:
+    version = snapshot.current_cycle()
+    entry = local_cache.get_entry(cache_key)
+    if entry is not None:
+        stamp, cached = entry
+        etag = conditional.make_etag(version, f"{cache_key}|{stamp}")
+        response = conditional.lookup(request, etag)
+        if response is not None:
+            return response
         logger.info("Fetched cycle filters from cache")
-        return local_cache[cache_key]
+        return conditional.respond(request, etag, cached)
 
     query = "SELECT DISTINCT dx_cycle FROM anbc-hcb-dev.vbc_dtxp_hcb_dev.vbc_parm_dtxp_hist_v"
     try:
         results = execute_query(query)
         filtered = [row["dx_cycle"] for row in results if row["dx_cycle"] is not None]
-        local_cache[cache_key] = filtered
+        stamp = local_cache.set(cache_key, filtered)
         logger.info("Fetched cycle filters from DB and cached")
-        return filtered
+        await asyncio.to_thread(events.publish, "filters", key=cache_key, version=version)
+        etag = conditional.make_etag(version, f"{cache_key}|{stamp}")
+        return conditional.respond(request, etag, filtered)
     except Exception as e:
         logger.error(f"Failed to execute basic query: {str(e)}")
         raise HTTPException(
@@ -36,19 +52,28 @@ async def get_cycle_filters() -> List[int]:
         )
 
 @filters_router.get("/org-log")
-async def get_org_log_filters() -> List[str]:
+async def get_org_log_filters(request: Request) -> List[str]:
     cache_key = "org_log_filters"
-    if cache_key in local_cache:
+    version = snapshot.current_cycle()
+    entry = local_cache.get_entry(cache_key)
+    if entry is not None:
+        stamp, cached = entry
+        etag = conditional.make_etag(version, f"{cache_key}|{stamp}")
+        response = conditional.lookup(request, etag)
+        if response is not None:
+            return response
         logger.info("Fetched org_log filters from cache")
-        return local_cache[cache_key]
+        return conditional.respond(request, etag, cached)
 
     query = "SELECT DISTINCT org_log FROM anbc-hcb-dev.vbc_dtxp_hcb_dev.vbc_parm_dtxp_hist_v"
     try:
         results = execute_query(query)
         filtered = [row["org_log"] for row in results if row["org_log"] is not None]
-        local_cache[cache_key] = filtered
+        stamp = local_cache.set(cache_key, filtered)
         logger.info("Fetched org_log filters from DB and cached")
-        return filtered
+        await asyncio.to_thread(events.publish, "filters", key=cache_key, version=version)
+        etag = conditional.make_etag(version, f"{cache_key}|{stamp}")
+        return conditional.respond(request, etag, filtered)
     except Exception as e:
         logger.error(f"Failed to execute basic query: {str(e)}")
         raise HTTPException(
@@ -57,19 +82,28 @@ async def get_org_log_filters() -> List[str]:
         )
 
 @filters_router.get("/org-cd")
-async def get_org_cd_filters() -> List[str]:
+async def get_org_cd_filters(request: Request) -> List[str]:
     cache_key = "org_cd_filters"
-    if cache_key in local_cache:
+    version = snapshot.current_cycle()
+    entry = local_cache.get_entry(cache_key)
+    if entry is not None:
+        stamp, cached = entry
+        etag = conditional.make_etag(version, f"{cache_key}|{stamp}")
+        response = conditional.lookup(request, etag)
+        if response is not None:
+            return response
         logger.info("Fetched org_cd filters from cache")
-        return local_cache[cache_key]
+        return conditional.respond(request, etag, cached)
 
     query = "SELECT DISTINCT org_cd FROM anbc-hcb-dev.vbc_dtxp_hcb_dev.vbc_parm_dtxp_hist_v"
     try:
         results = execute_query(query)
         filtered = [row["org_cd"] for row in results if row["org_cd"] is not None]
-        local_cache[cache_key] = filtered
+        stamp = local_cache.set(cache_key, filtered)
         logger.info("Fetched org_cd filters from DB and cached")
-        return filtered
+        await asyncio.to_thread(events.publish, "filters", key=cache_key, version=version)
+        etag = conditional.make_etag(version, f"{cache_key}|{stamp}")
+        return conditional.respond(request, etag, filtered)
     except Exception as e:
         logger.error(f"Failed to execute basic query: {str(e)}")
         raise HTTPException(
@@ -78,19 +112,28 @@ async def get_org_cd_filters() -> List[str]:
         )
 
 @filters_router.get("/engmt-manager")
-async def get_engmt_manager_filters() -> List[str]:
+async def get_engmt_manager_filters(request: Request) -> List[str]:
     cache_key = "engmt_manager_filters"
-    if cache_key in local_cache:
+    version = snapshot.current_cycle()
+    entry = local_cache.get_entry(cache_key)
+    if entry is not None:
+        stamp, cached = entry
+        etag = conditional.make_etag(version, f"{cache_key}|{stamp}")
+        response = conditional.lookup(request, etag)
+        if response is not None:
+            return response
         logger.info("Fetched engmt_manager filters from cache")
-        return local_cache[cache_key]
+        return conditional.respond(request, etag, cached)
 
     query = "SELECT DISTINCT engmt_manager FROM anbc-hcb-dev.vbc_dtxp_hcb_dev.vbc_parm_dtxp_hist_v"
     try:
         results = execute_query(query)
         filtered = [row["engmt_manager"] for row in results if row["engmt_manager"] is not None]
-        local_cache[cache_key] = filtered
+        stamp = local_cache.set(cache_key, filtered)
         logger.info("Fetched engmt_manager filters from DB and cached")
-        return filtered
+        await asyncio.to_thread(events.publish, "filters", key=cache_key, version=version)
+        etag = conditional.make_etag(version, f"{cache_key}|{stamp}")
+        return conditional.respond(request, etag, filtered)
     except Exception as e:
         logger.error(f"Failed to execute basic query: {str(e)}")
         raise HTTPException(
@@ -99,19 +142,28 @@ async def get_engmt_manager_filters() -> List[str]:
         )
 
 @filters_router.get("/aco-analyst")
-async def get_aco_analyst_filters() -> List[str]:
+async def get_aco_analyst_filters(request: Request) -> List[str]:
     cache_key = "aco_analyst_filters"
-    if cache_key in local_cache:
+    version = snapshot.current_cycle()
+    entry = local_cache.get_entry(cache_key)
+    if entry is not None:
+        stamp, cached = entry
+        etag = conditional.make_etag(version, f"{cache_key}|{stamp}")
+        response = conditional.lookup(request, etag)
+        if response is not None:
+            return response
         logger.info("Fetched aco_analyst filters from cache")
-        return local_cache[cache_key]
+        return conditional.respond(request, etag, cached)
 
     query = "SELECT DISTINCT aco_analyst FROM anbc-hcb-dev.vbc_dtxp_hcb_dev.vbc_parm_dtxp_hist_v"
     try:
         results = execute_query(query)
         filtered = [row["aco_analyst"] for row in results if row["aco_analyst"] is not None]
-        local_cache[cache_key] = filtered
+        stamp = local_cache.set(cache_key, filtered)
         logger.info("Fetched aco_analyst filters from DB and cached")
-        return filtered
+        await asyncio.to_thread(events.publish, "filters", key=cache_key, version=version)
+        etag = conditional.make_etag(version, f"{cache_key}|{stamp}")
+        return conditional.respond(request, etag, filtered)
     except Exception as e:
         logger.error(f"Failed to execute basic query: {str(e)}")
         raise HTTPException(
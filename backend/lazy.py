@@ -0,0 +1,21 @@
+import importlib
+from typing import Any, Callable, Optional
+
+
+def lazy_callable(module: str, name: str, package: Optional[str] = None) -> Callable[..., Any]:
+    """Stand-in for ``from <module> import <name>`` that imports on the first call.
+
+    Keeps google-cloud-bigquery and the oauth2 client out of app start-up;
+    they are loaded by the first request that actually runs a query.
+    """
+    target: Optional[Callable[..., Any]] = None
+
+    def call(*args, **kwargs):
+        nonlocal target
+        if target is None:
+            target = getattr(importlib.import_module(module, package), name)
+        return target(*args, **kwargs)
+
+    call.__name__ = name
+    call.__qualname__ = name
+    return call
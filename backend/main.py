@@ -135,43 +135,14 @@ def get_bigquery_client() -> bigquery.Client:
 # Stdlib imports
 import logging
 
-# Third-party imports
-from fastapi import FastAPI
-from fastapi.middleware.cors import CORSMiddleware
-
 # Local imports
-from .routers import org_setup_router, filters_router, auth_router
-from . import __version__  # Assume you add this
-
-app = FastAPI(
-    title="VBC Data Express Backend",
-    description="Backend service for VBC Data Express to view SFTP, org setup, and data analysis details.",
-    version=__version__ or "1.0.0",
-    docs_url="/docs",
-    redoc_url="/redoc",
-    openapi_tags=[
-        {"name": "Org Setup", "description": "Endpoints to manage organization setup details, including file configurations."},
-    ],
-)
-
-@app.get("/health")
-def health():
-    return {"health": "ok"}
-
-app.add_middleware(
-    CORSMiddleware,
-    allow_origins=[
-        "http://localhost:3000",
-        "https://vbc-dtxp-review-tool-ui.hcb-dev.aig.aetna.com",
-    ],
-    allow_credentials=True,
-    allow_methods=["*"],
-    allow_headers=["*"],
-)
-
-app.include_router(org_setup_router)
-app.include_router(filters_router)
-app.include_router(auth_router)
+from .routers.app_factory import create_app
+
+# Routers, middleware and background jobs are wired in create_app(); BigQuery
+# clients and the disk caches are only opened by the first request using them.
+# Import-time report: python -m app.routers.startup_profile app.main
+# Time to first healthy /health: python -m app.routers.bench_startup
+app = create_app()
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -345,5 +316,8 @@ async def get_cycle_filters():
 from .org_setup import org_setup_router
 from .filters import filters_router
 from .auth import auth_router  # Assuming auth.py exists
+from .events import events_router
+from .chat import chat_router
+from .sftp_status import sftp_router
 ```
 
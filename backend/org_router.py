@@ -1,17 +1,47 @@
 # app/routers/org_setup.py
 
-from fastapi import APIRouter, Query, Depends, HTTPException
+import json
+from fastapi import APIRouter, Query, Depends, HTTPException, Request
 from typing import Optional, List
 from pydantic import BaseModel
 from ..schemas.org_setup import OrgSetupResponse, PaginatedOrgSetupResponse
-from ..services.bigquery_service import execute_query
+from .lazy import lazy_callable
 from ..services.org_setup_service import get_org_setup_files
-from ..dependencies import get_bigquery_client  # Optional if service handles it
+from . import conditional, snapshot
+from .tiered_cache import TieredCache
+
+execute_query = lazy_callable("..services.bigquery_service", "execute_query", __package__)
 
 org_setup_router = APIRouter(prefix="/api/org-setup", tags=["Org Setup"])
 
+# Flattened pages, max 200 in memory backed by a disk store, TTL = 86400 seconds (24 hours)
+page_cache = TieredCache("org_setup_pages", maxsize=200, ttl=86400)
+snapshot.on_cycle_change(page_cache.set_current_cycle)
+
+
+def filter_signature(**filters) -> str:
+    """Canonical form of the request filters; equal filters give equal strings."""
+    normalized = {}
+    for name, value in filters.items():
+        if value is None or value == []:
+            continue
+        if name == "cycle":
+            value = sorted({int(c) for c in value})
+        elif isinstance(value, list):
+            value = sorted(set(value))
+        normalized[name] = value
+    return json.dumps(normalized, sort_keys=True, separators=(",", ":"))
+
+
+def page_cycle(cycle: Optional[List[str]]) -> Optional[int]:
+    """The single dx_cycle a page is limited to, or None when it spans cycles."""
+    cycles = {int(c) for c in cycle or []}
+    return cycles.pop() if len(cycles) == 1 else None
+
+
 @org_setup_router.get("/", responses={404: {"description": "Not found"}, 500: {"description": "Internal server error"}})
 async def get_org_setup(
+    request: Request,
     cycle: Optional[List[str]] = Query(None),
     org_log: Optional[List[str]] = Query(None),
     org_cd: Optional[List[str]] = Query(None),
@@ -24,6 +54,33 @@ async def get_org_setup(
     """Fetch paginated org setup details using keyset pagination.
     Ordered by dx_cycle DESC, org_log ASC.
     """
+    cache_key = filter_signature(
+        cycle=cycle,
+        org_log=org_log,
+        org_cd=org_cd,
+        engmt_manager=engmt_manager,
+        aco_analyst=aco_analyst,
+        limit=limit,
+        last_dx_cycle=last_dx_cycle,
+        last_org_log=last_org_log,
+    )
+    current = snapshot.current_cycle()
+    tag = page_cycle(cycle)
+    # A page limited to a closed cycle keeps its ETag when new cycles land.
+    version = tag if tag is not None and current is not None and tag < current else current
+    entry = page_cache.get_entry(cache_key)
+    if entry is not None:
+        stamp, cached = entry
+        etag = conditional.make_etag(version, f"{cache_key}|{stamp}")
+        response = conditional.lookup(request, etag)
+        if response is not None:
+            return response
+        return conditional.respond(request, etag, PaginatedOrgSetupResponse(
+            data=[OrgSetupResponse(**response) for response in cached],
+            total=len(cached),
+            limit=limit,
+        ))
+
     base_query = "SELECT * FROM `anbc-hcb-dev.vbc_dtxp_hcb_dev.vbc_parm_dtxp_hist_v`"
     filters = []
 
@@ -71,19 +128,18 @@ async def get_org_setup(
         raise HTTPException(status_code=404, detail="No org setups found")
 
     # Flatten and convert to OrgSetupResponse
-    all_org_setup_responses = []
+    flattened = []
     for item in results:
-        org_setup_responses = [
-            OrgSetupResponse(**response)
-            for response in get_org_setup_files(item)
-        ]
-        all_org_setup_responses.extend(org_setup_responses)
+        flattened.extend(get_org_setup_files(item))
+    stamp = page_cache.set(cache_key, flattened, cycle=tag)
+    etag = conditional.make_etag(version, f"{cache_key}|{stamp}")
+    all_org_setup_responses = [OrgSetupResponse(**response) for response in flattened]
 
-    return PaginatedOrgSetupResponse(
+    return conditional.respond(request, etag, PaginatedOrgSetupResponse(
         data=all_org_setup_responses,
         total=len(all_org_setup_responses),  # Or fetch total separately for efficiency
         limit=limit,
-    )
+    ))
 
 @org_setup_router.get("/total-files-count")
 async def get_org_setup_total_files():
@@ -0,0 +1,399 @@
+import asyncio
+import csv
+import fcntl
+import glob
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from datetime import datetime, timezone
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+from fastapi import APIRouter, HTTPException, Query
+from .lazy import lazy_callable
+from ..services.org_setup_service import get_org_setup_files
+from . import snapshot
+from .tiered_cache import CACHE_DIR, ensure_cache_dir
+
+execute_query = lazy_callable("..services.bigquery_service", "execute_query", __package__)
+
+sftp_router = APIRouter(prefix="/api/sftp-status", tags=["SFTP Status"])
+
+# Set up logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Transfer manifests written by the SFTP host: *.jsonl (one JSON object per
+# line) or *.csv with a header row. Both carry timestamp, sftp_tag, file,
+# cycle, status and filename; org_cd is optional.
+SFTP_LOG_DIR = os.getenv("SFTP_LOG_DIR", "/var/log/sftp-transfers")
+INGEST_INTERVAL = 30
+# The open cycle still gains orgs and files, so its expected set is reloaded
+# once the last load is this old. A load claimed by a worker that died is
+# taken over after LOAD_CLAIM_TIMEOUT.
+EXPECTED_MAX_AGE = 3600
+LOAD_CLAIM_TIMEOUT = 600
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS file_status (
+    org_cd TEXT NOT NULL,
+    cycle INTEGER NOT NULL,
+    file TEXT NOT NULL COLLATE NOCASE,
+    org_log TEXT,
+    sftp_tag TEXT COLLATE NOCASE,
+    cadence TEXT,
+    status TEXT NOT NULL,
+    delivered_at TEXT,
+    filename TEXT,
+    PRIMARY KEY (org_cd, cycle, file)
+);
+CREATE INDEX IF NOT EXISTS file_status_tag ON file_status (sftp_tag, cycle, file);
+CREATE INDEX IF NOT EXISTS file_status_cycle ON file_status (cycle, status, delivered_at);
+CREATE TABLE IF NOT EXISTS offsets (path TEXT PRIMARY KEY, inode INTEGER NOT NULL, position INTEGER NOT NULL);
+CREATE TABLE IF NOT EXISTS expected_loads (cycle INTEGER PRIMARY KEY, claimed_at REAL NOT NULL, loaded_at REAL);
+"""
+
+_COLUMNS = ("org_cd", "cycle", "file", "org_log", "sftp_tag", "cadence", "status", "delivered_at", "filename")
+
+
+def to_utc(value: datetime) -> str:
+    """Fixed-width UTC ISO text, so stored times compare correctly as strings.
+
+    Naive times are taken to be UTC already.
+    """
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return value.astimezone(timezone.utc).isoformat(timespec="microseconds")
+
+
+def tail(path: str, position: int) -> Iterator[Tuple[str, int]]:
+    """Yield complete lines appended after ``position`` with the offset after each."""
+    with open(path, "rb") as handle:
+        handle.seek(position)
+        for raw in handle:
+            if not raw.endswith(b"\n"):
+                break  # Still being written; picked up on the next pass
+            position += len(raw)
+            yield raw.decode("utf-8", errors="replace").rstrip("\r\n"), position
+
+
+def parse(path: str, lines: Iterable[Tuple[str, int]]) -> Iterator[Tuple[Optional[Dict[str, Any]], int]]:
+    """Decode manifest lines; skipped lines come through as None so the offset still advances."""
+    if path.endswith(".csv"):
+        # Reading may resume mid-file, so the header always comes from the first line
+        with open(path, encoding="utf-8", errors="replace") as handle:
+            header = next(csv.reader([handle.readline()]), [])
+        for line, position in lines:
+            values = next(csv.reader([line]), None)
+            if not values or values == header:
+                yield None, position
+                continue
+            yield dict(zip(header, values)), position
+        return
+    for line, position in lines:
+        if not line.strip():
+            yield None, position
+            continue
+        try:
+            yield json.loads(line), position
+        except json.JSONDecodeError:
+            logger.warning(f"Skipping malformed manifest line in {path}: {line[:200]}")
+            yield None, position
+
+
+def normalize(records: Iterable[Tuple[Optional[Dict[str, Any]], int]]) -> Iterator[Tuple[Optional[Dict[str, Any]], int]]:
+    """Validate transfer records; invalid ones come through as None to advance the offset."""
+    for record, position in records:
+        if record is None:
+            yield None, position
+            continue
+        try:
+            transfer = {
+                "org_cd": record.get("org_cd") or None,
+                "sftp_tag": (record.get("sftp_tag") or "").strip() or None,
+                "file": str(record["file"]).strip(),
+                "cycle": int(record["cycle"]),
+                "status": str(record.get("status") or "delivered").strip().lower(),
+                "delivered_at": to_utc(datetime.fromisoformat(str(record["timestamp"]))),
+                "filename": record.get("filename"),
+            }
+        except (KeyError, TypeError, ValueError) as e:
+            logger.warning(f"Skipping invalid transfer record {record}: {str(e)}")
+            yield None, position
+            continue
+        if transfer["org_cd"] is None and transfer["sftp_tag"] is None:
+            logger.warning(f"Skipping transfer record without org_cd or sftp_tag: {record}")
+            yield None, position
+            continue
+        yield transfer, position
+
+
+class SftpStatusStore:
+    """Delivery status per (org_cd, cycle, file), joined against the expected setup files.
+
+    Expected files come from ``get_org_setup_files`` and start as "expected";
+    manifest records flip them to their transfer status. Lookups go through
+    the primary key or the (sftp_tag, cycle, file) and (cycle, status)
+    indexes, never through a scan of the setup table.
+    """
+
+    def __init__(self, path: str, log_dir: str = SFTP_LOG_DIR):
+        self.path = path
+        self.log_dir = log_dir
+        self.unmatched = 0
+        self._lock = threading.Lock()
+        self._db: Optional[sqlite3.Connection] = None
+
+    def _connection(self) -> sqlite3.Connection:
+        # Opened on first use so importing the router does no disk I/O
+        if self._db is None:
+            ensure_cache_dir(os.path.dirname(self.path))
+            db = sqlite3.connect(self.path, check_same_thread=False, timeout=5)
+            db.row_factory = sqlite3.Row
+            db.execute("PRAGMA journal_mode=WAL")
+            db.executescript(_SCHEMA)
+            self._db = db
+        return self._db
+
+    def load_expected(self, cycle: int, max_age: Optional[float] = None) -> int:
+        """Insert the expected files of ``cycle``; returns how many were added.
+
+        A cycle is loaded once, or again when its last load is older than
+        ``max_age`` seconds. The load is claimed in the store before querying,
+        so across workers only one of them scans the cycle in BigQuery.
+        """
+        if not self._claim_load(cycle, max_age):
+            return 0
+        try:
+            rows = self._expected_rows(cycle)
+        except Exception:
+            with self._lock, self._connection() as db:
+                db.execute("UPDATE expected_loads SET claimed_at = 0 WHERE cycle = ?", (cycle,))
+            raise
+        with self._lock, self._connection() as db:
+            cursor = db.executemany(
+                "INSERT OR IGNORE INTO file_status (org_cd, cycle, file, org_log, sftp_tag, cadence, status) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                rows,
+            )
+            db.execute("UPDATE expected_loads SET loaded_at = ? WHERE cycle = ?", (time.time(), cycle))
+        logger.info(f"Loaded {cursor.rowcount} expected SFTP files for cycle {cycle}")
+        return cursor.rowcount
+
+    def _claim_load(self, cycle: int, max_age: Optional[float]) -> bool:
+        now = time.time()
+        with self._lock:
+            db = self._connection()
+            db.execute("BEGIN IMMEDIATE")
+            try:
+                row = db.execute(
+                    "SELECT claimed_at, loaded_at FROM expected_loads WHERE cycle = ?", (cycle,)
+                ).fetchone()
+                if row is not None:
+                    loaded = row["loaded_at"]
+                    fresh = loaded is not None and (max_age is None or now - loaded < max_age)
+                    loading = (loaded is None or loaded < row["claimed_at"]) and now - row["claimed_at"] < LOAD_CLAIM_TIMEOUT
+                    if fresh or loading:
+                        db.commit()
+                        return False
+                db.execute(
+                    "INSERT OR REPLACE INTO expected_loads (cycle, claimed_at, loaded_at) VALUES (?, ?, ?)",
+                    (cycle, now, row["loaded_at"] if row is not None else None),
+                )
+                db.commit()
+                return True
+            except sqlite3.Error:
+                db.rollback()
+                raise
+
+    def _expected_rows(self, cycle: int) -> List[Tuple]:
+        query = f"SELECT * FROM `anbc-hcb-dev.vbc_dtxp_hcb_dev.vbc_parm_dtxp_hist_v` WHERE dx_cycle = {int(cycle)}"
+        rows = []
+        for record in execute_query(query):
+            sftp_tag = record.get("elig_ftp_tag")
+            if sftp_tag in ("", "null"):
+                sftp_tag = None
+            for file_info in get_org_setup_files(record):
+                if not file_info.get("org_cd") or not file_info.get("file"):
+                    continue
+                rows.append((
+                    file_info["org_cd"], cycle, file_info["file"], file_info.get("org_log"),
+                    sftp_tag, file_info.get("cadence"), "expected",
+                ))
+        return rows
+
+    def ingest_once(self) -> int:
+        """Read everything appended to the manifests since the last pass.
+
+        Every worker runs the ingester, but only the one holding the ingest
+        lock reads a pass, so offsets only ever move forward.
+        """
+        applied = 0
+        paths = sorted(glob.glob(os.path.join(self.log_dir, "*.jsonl")) + glob.glob(os.path.join(self.log_dir, "*.csv")))
+        if not paths:
+            return 0
+        self._connection()
+        with open(f"{self.path}.ingest.lock", "a") as lock:
+            try:
+                fcntl.flock(lock, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except BlockingIOError:
+                return 0  # Another worker is ingesting this pass
+            for path in paths:
+                try:
+                    applied += self._ingest_file(path)
+                except OSError as e:
+                    logger.error(f"Failed to read SFTP manifest {path}: {str(e)}")
+        return applied
+
+    def _ingest_file(self, path: str) -> int:
+        inode = os.stat(path).st_ino
+        with self._lock:
+            row = self._connection().execute("SELECT inode, position FROM offsets WHERE path = ?", (path,)).fetchone()
+        # A rotated or truncated manifest is read again from the start
+        position = row["position"] if row is not None and row["inode"] == inode else 0
+        if position > os.path.getsize(path):
+            position = 0
+
+        applied = 0
+        transfers = normalize(parse(path, tail(path, position)))
+        batch: List[Dict[str, Any]] = []
+        for transfer, position in transfers:
+            if transfer is not None:
+                batch.append(transfer)
+            if len(batch) >= 500:
+                if not self._expected_ready(batch):
+                    return applied
+                applied += self._apply(batch, path, inode, position)
+                batch = []
+        if self._expected_ready(batch):
+            applied += self._apply(batch, path, inode, position)
+        return applied
+
+    def _expected_ready(self, transfers: List[Dict[str, Any]]) -> bool:
+        """Load the expected files for the batch's cycles; False while another worker still is."""
+        for cycle in {transfer["cycle"] for transfer in transfers}:
+            self.load_expected(cycle)
+            with self._lock:
+                row = self._connection().execute(
+                    "SELECT loaded_at FROM expected_loads WHERE cycle = ?", (cycle,)
+                ).fetchone()
+            if row is None or row["loaded_at"] is None:
+                # The offset stays put, so these records are applied on a later pass
+                logger.info(f"Expected SFTP files for cycle {cycle} are still loading; retrying next pass")
+                return False
+        return True
+
+    def _apply(self, transfers: List[Dict[str, Any]], path: str, inode: int, position: int) -> int:
+        applied = 0
+        with self._lock, self._connection() as db:
+            for transfer in transfers:
+                values = (transfer["status"], transfer["delivered_at"], transfer["filename"], transfer["cycle"], transfer["file"])
+                if transfer["org_cd"] is not None:
+                    cursor = db.execute(
+                        "UPDATE file_status SET status = ?, delivered_at = ?, filename = ? "
+                        "WHERE cycle = ? AND file = ? AND org_cd = ?",
+                        values + (transfer["org_cd"],),
+                    )
+                else:
+                    cursor = db.execute(
+                        "UPDATE file_status SET status = ?, delivered_at = ?, filename = ? "
+                        "WHERE cycle = ? AND file = ? AND sftp_tag = ?",
+                        values + (transfer["sftp_tag"],),
+                    )
+                if cursor.rowcount:
+                    applied += cursor.rowcount
+                else:
+                    self.unmatched += 1
+            db.execute(
+                "INSERT OR REPLACE INTO offsets (path, inode, position) VALUES (?, ?, ?)",
+                (path, inode, position),
+            )
+        return applied
+
+    def _select(self, where: str, params: Tuple) -> List[Dict[str, Any]]:
+        with self._lock:
+            rows = self._connection().execute(
+                f"SELECT {', '.join(_COLUMNS)} FROM file_status WHERE {where} ORDER BY org_cd, file", params
+            ).fetchall()
+        return [dict(row) for row in rows]
+
+    def for_org(self, org_cd: str, cycle: Optional[int] = None) -> List[Dict[str, Any]]:
+        if cycle is None:
+            return self._select("org_cd = ?", (org_cd,))
+        return self._select("org_cd = ? AND cycle = ?", (org_cd, cycle))
+
+    def missing(self, cycle: int) -> List[Dict[str, Any]]:
+        return self._select("cycle = ? AND status != 'delivered'", (cycle,))
+
+    def late(self, cycle: int, due: datetime) -> List[Dict[str, Any]]:
+        return self._select(
+            "cycle = ? AND status = 'delivered' AND delivered_at > ?", (cycle, to_utc(due))
+        )
+
+
+status_store = SftpStatusStore(os.path.join(CACHE_DIR, "sftp_status.sqlite3"))
+
+
+async def run_ingester(interval: float = INGEST_INTERVAL) -> None:
+    """Tail the manifests forever; meant to be started once per app as a background task.
+
+    Expected files are loaded only for cycles that show up in manifest records
+    (or on a request for a cycle), so a worker without manifests never
+    queries BigQuery.
+    """
+    while True:
+        try:
+            applied = await asyncio.to_thread(status_store.ingest_once)
+            if applied:
+                logger.info(f"Applied {applied} SFTP transfer records")
+        except Exception as e:
+            logger.error(f"SFTP status ingestion failed: {str(e)}")
+        await asyncio.sleep(interval)
+
+
+async def _from_store(method, *args):
+    """Run a store call off the event loop; a store that cannot be opened answers 503."""
+    try:
+        return await asyncio.to_thread(method, *args)
+    except (OSError, sqlite3.Error) as e:
+        logger.error(f"SFTP status store unavailable: {str(e)}")
+        raise HTTPException(status_code=503, detail="SFTP status store unavailable")
+
+
+async def _load_expected(cycle: int) -> None:
+    """Make sure ``cycle`` has its expected rows; the open cycle is reloaded as it grows."""
+    max_age = EXPECTED_MAX_AGE if cycle == snapshot.current_cycle() else None
+    try:
+        await _from_store(status_store.load_expected, cycle, max_age)
+    except HTTPException:
+        raise
+    except Exception as e:
+        # Serve what the store already has rather than failing the request
+        logger.error(f"Failed to load expected SFTP files for cycle {cycle}: {str(e)}")
+
+
+@sftp_router.get("/org/{org_cd}")
+async def get_org_sftp_status(org_cd: str, cycle: Optional[int] = Query(None)):
+    if cycle is not None:
+        await _load_expected(cycle)
+    return await _from_store(status_store.for_org, org_cd, cycle)
+
+
+@sftp_router.get("/missing")
+async def get_missing_files(cycle: Optional[int] = Query(None)):
+    """Expected files that have not been delivered for the cycle (default: current)."""
+    cycle = cycle if cycle is not None else snapshot.current_cycle()
+    if cycle is None:
+        raise HTTPException(status_code=404, detail="No cycle available")
+    await _load_expected(cycle)
+    return await _from_store(status_store.missing, cycle)
+
+
+@sftp_router.get("/late")
+async def get_late_files(due: datetime, cycle: Optional[int] = Query(None)):
+    """Files delivered after ``due`` for the cycle (default: current)."""
+    cycle = cycle if cycle is not None else snapshot.current_cycle()
+    if cycle is None:
+        raise HTTPException(status_code=404, detail="No cycle available")
+    return await _from_store(status_store.late, cycle, due)
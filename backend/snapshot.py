@@ -0,0 +1,52 @@
+import logging
+from typing import Callable, List, Optional
+from cachetools import TTLCache
+from .lazy import lazy_callable
+
+execute_query = lazy_callable("..services.bigquery_service", "execute_query", __package__)
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# The newest dx_cycle is the snapshot version every cache is keyed on.
+# Checking it costs one BigQuery query, so the answer is reused for 5 minutes.
+_snapshot_cache = TTLCache(maxsize=1, ttl=300)
+_cycle_listeners: List[Callable[[int], None]] = []
+_last_seen_cycle: Optional[int] = None
+
+
+def on_cycle_change(listener: Callable[[int], None]) -> None:
+    """Register a callback invoked with the new dx_cycle whenever it changes.
+
+    The first successful check after start-up also counts as a change, so a
+    listener always learns the current cycle once per process.
+    """
+    _cycle_listeners.append(listener)
+
+
+def current_cycle() -> Optional[int]:
+    """Return the newest dx_cycle, or the last known one if BigQuery is unavailable."""
+    global _last_seen_cycle
+    if "cycle" in _snapshot_cache:
+        return _snapshot_cache["cycle"]
+
+    query = "SELECT MAX(dx_cycle) AS dx_cycle FROM anbc-hcb-dev.vbc_dtxp_hcb_dev.vbc_parm_dtxp_hist_v"
+    try:
+        results = execute_query(query)
+    except Exception as e:
+        logger.error(f"Failed to fetch snapshot version: {str(e)}")
+        return _last_seen_cycle
+
+    cycle = results[0]["dx_cycle"] if results else None
+    cycle = int(cycle) if cycle is not None else None
+    _snapshot_cache["cycle"] = cycle
+
+    if cycle is not None and cycle != _last_seen_cycle:
+        logger.info(f"Snapshot version changed: {_last_seen_cycle} -> {cycle}")
+        _last_seen_cycle = cycle
+        for listener in _cycle_listeners:
+            try:
+                listener(cycle)
+            except Exception as e:
+                logger.error(f"Cycle change listener failed: {str(e)}")
+    return cycle
@@ -0,0 +1,68 @@
+"""Import-time report for the backend.
+
+Usage: python -m app.routers.startup_profile [module] [--top N]
+
+Runs ``python -X importtime -c "import <module>"`` in a fresh interpreter
+and lists the modules that cost the most, by cumulative and by self time.
+"""
+import argparse
+import re
+import subprocess
+import sys
+from typing import List, NamedTuple
+
+_LINE = re.compile(r"import time:\s+(\d+)\s+\|\s+(\d+)\s+\|(\s*)(\S+)")
+
+
+class ImportTiming(NamedTuple):
+    self_us: int
+    cumulative_us: int
+    depth: int
+    module: str
+
+
+def profile_imports(module: str) -> List[ImportTiming]:
+    completed = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        capture_output=True,
+        text=True,
+    )
+    if completed.returncode != 0:
+        raise RuntimeError(f"Importing {module} failed:\n{completed.stderr[-2000:]}")
+    timings = []
+    for line in completed.stderr.splitlines():
+        match = _LINE.match(line)
+        if match:
+            self_us, cumulative_us, indent, name = match.groups()
+            timings.append(ImportTiming(int(self_us), int(cumulative_us), (len(indent) - 1) // 2, name))
+    return timings
+
+
+def report(module: str, top: int = 20) -> str:
+    timings = profile_imports(module)
+    total_us = sum(timing.self_us for timing in timings)
+    lines = [f"Importing {module}: {total_us / 1000:.1f} ms across {len(timings)} modules", ""]
+
+    # Depth 0 is dominated by the module itself; its direct imports say more
+    lines.append(f"Top {top} by cumulative time (first two import levels):")
+    shallow = [timing for timing in timings if timing.depth <= 1 and timing.module != module]
+    for timing in sorted(shallow, key=lambda t: t.cumulative_us, reverse=True)[:top]:
+        lines.append(f"  {timing.cumulative_us / 1000:9.1f} ms  {timing.module}")
+
+    lines.append("")
+    lines.append(f"Top {top} by self time:")
+    for timing in sorted(timings, key=lambda t: t.self_us, reverse=True)[:top]:
+        lines.append(f"  {timing.self_us / 1000:9.1f} ms  {timing.module}")
+    return "\n".join(lines)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("module", nargs="?", default="app.main")
+    parser.add_argument("--top", type=int, default=20)
+    args = parser.parse_args()
+    print(report(args.module, args.top))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,275 @@
+import json
+import logging
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+import zlib
+from typing import Any, Hashable, Optional, Tuple
+from cachetools import LRUCache
+
+try:
+    import orjson
+except ImportError:  # Optional: falls back to the stdlib encoder
+    orjson = None
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+_DEFAULT_CACHE_DIR = os.path.join(tempfile.gettempdir(), "vbc-dtxp-cache")
+CACHE_DIR = os.getenv("ORG_SETUP_CACHE_DIR", _DEFAULT_CACHE_DIR)
+
+# Payloads above this size are zlib-compressed before they hit the disk.
+_COMPRESS_THRESHOLD = 1024
+# Values are stored as JSON, never pickle, so a tampered store cannot run code.
+_RAW, _ZLIB = b"j", b"J"
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS entries (
+    key TEXT PRIMARY KEY,
+    cycle INTEGER,
+    expires_at REAL NOT NULL,
+    accessed_at REAL NOT NULL,
+    size INTEGER NOT NULL,
+    value BLOB NOT NULL
+);
+CREATE INDEX IF NOT EXISTS entries_cycle ON entries (cycle);
+CREATE INDEX IF NOT EXISTS entries_accessed_at ON entries (accessed_at);
+CREATE TABLE IF NOT EXISTS meta (name TEXT PRIMARY KEY, value TEXT);
+"""
+
+
+def ensure_cache_dir(path: str) -> None:
+    """Create ``path``, and refuse the default location if someone else controls it.
+
+    The default location is under the shared temp directory, where another
+    user could otherwise create the directory or its SQLite files first. A
+    directory configured through ORG_SETUP_CACHE_DIR (an emptyDir or shared
+    volume, say) is the operator's choice and is used as it is.
+    """
+    os.makedirs(path, mode=0o700, exist_ok=True)
+    if os.path.abspath(path) != os.path.abspath(_DEFAULT_CACHE_DIR):
+        return
+    info = os.stat(path)
+    if hasattr(os, "getuid") and info.st_uid != os.getuid():
+        raise PermissionError(f"Cache directory {path} is owned by another user")
+    if info.st_mode & 0o077:
+        raise PermissionError(f"Cache directory {path} is accessible to other users")
+
+
+def _dumps(value: Any) -> bytes:
+    # Non-JSON scalars (dates, decimals) come back as strings, as they would from the API
+    if orjson is not None:
+        payload = orjson.dumps(value, default=str)
+    else:
+        payload = json.dumps(value, separators=(",", ":"), default=str).encode()
+    if len(payload) > _COMPRESS_THRESHOLD:
+        return _ZLIB + zlib.compress(payload, 1)
+    return _RAW + payload
+
+
+def _loads(blob: bytes) -> Any:
+    marker, payload = blob[:1], blob[1:]
+    if marker == _ZLIB:
+        payload = zlib.decompress(payload)
+    elif marker != _RAW:
+        raise ValueError(f"unknown cache entry format {marker!r}")
+    return json.loads(payload)
+
+
+def _is_stale(entry_cycle: Optional[int], previous_cycle: int) -> bool:
+    # Entries spanning every cycle (entry_cycle is None) and entries for the
+    # cycle that was open until now may have changed; closed cycles have not.
+    return entry_cycle is None or entry_cycle >= previous_cycle
+
+
+class TieredCache:
+    """In-memory LRU in front of a SQLite store that survives restarts.
+
+    Every entry is tagged with the dx_cycle it was built from, or ``None`` when
+    it spans all cycles (filter lists, unfiltered pages). When a new cycle
+    lands, ``set_current_cycle`` drops only the entries that could have
+    changed and keeps pages for closed cycles. Disk failures are logged and the
+    cache degrades to memory only, so a cache problem never fails a request.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        maxsize: int = 100,
+        ttl: float = 86400,
+        max_disk_bytes: int = 64 * 1024 * 1024,
+        cache_dir: str = CACHE_DIR,
+    ):
+        self.name = name
+        self.ttl = ttl
+        self.max_disk_bytes = max_disk_bytes
+        self.cache_dir = cache_dir
+        self._memory: LRUCache = LRUCache(maxsize=maxsize)
+        self._lock = threading.Lock()
+        self._cycle: Optional[int] = None
+        self._db: Optional[sqlite3.Connection] = None
+        self._db_opened = False
+
+    def __contains__(self, key: Hashable) -> bool:
+        return self.get(key) is not None
+
+    def __getitem__(self, key: Hashable) -> Any:
+        value = self.get(key)
+        if value is None:
+            raise KeyError(key)
+        return value
+
+    def __setitem__(self, key: Hashable, value: Any) -> None:
+        self.set(key, value)
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        entry = self.get_entry(key)
+        return default if entry is None else entry[1]
+
+    def get_entry(self, key: Hashable) -> Optional[Tuple[float, Any]]:
+        """Return ``(stamp, value)``; the stamp changes whenever the entry is rewritten.
+
+        Anything derived from the value, such as an ETag, can include the
+        stamp so it is refreshed together with the entry.
+        """
+        key = str(key)
+        now = time.time()
+        with self._lock:
+            entry: Optional[Tuple[float, Optional[int], Any]] = self._memory.get(key)
+            if entry is not None:
+                if entry[0] > now:
+                    return entry[0], entry[2]
+                del self._memory[key]
+
+            row = self._disk_get(key, now)
+            if row is None:
+                return None
+            expires_at, cycle, value = row
+            self._memory[key] = (expires_at, cycle, value)
+            return expires_at, value
+
+    def set(self, key: Hashable, value: Any, cycle: Optional[int] = None) -> float:
+        """Store ``value`` and return its stamp (see ``get_entry``)."""
+        key = str(key)
+        now = time.time()
+        expires_at = now + self.ttl
+        with self._lock:
+            self._memory[key] = (expires_at, cycle, value)
+            self._disk_set(key, value, cycle, expires_at, now)
+        return expires_at
+
+    def set_current_cycle(self, cycle: int) -> None:
+        """Record the newest dx_cycle and drop entries a new cycle invalidates."""
+        with self._lock:
+            previous = self._cycle
+            stored = self._disk_swap_cycle(cycle)
+            if previous is None:
+                previous = stored
+            self._cycle = cycle
+            if previous is None or previous == cycle:
+                return
+            for key, (_, entry_cycle, _) in list(self._memory.items()):
+                if _is_stale(entry_cycle, previous):
+                    del self._memory[key]
+            logger.info(f"Cache {self.name} invalidated for cycle {previous} -> {cycle}")
+
+    def clear(self) -> None:
+        with self._lock:
+            self._memory.clear()
+            if self._connection() is not None:
+                try:
+                    self._db.execute("DELETE FROM entries")
+                except sqlite3.Error as e:
+                    logger.error(f"Failed to clear disk cache {self.name}: {str(e)}")
+
+    def _connection(self) -> Optional[sqlite3.Connection]:
+        # Opened on first use so importing a router does no disk I/O
+        if not self._db_opened:
+            self._db_opened = True
+            try:
+                ensure_cache_dir(self.cache_dir)
+                self._db = sqlite3.connect(
+                    os.path.join(self.cache_dir, f"{self.name}.sqlite3"),
+                    check_same_thread=False,
+                    isolation_level=None,
+                    timeout=5,
+                )
+                self._db.execute("PRAGMA journal_mode=WAL")
+                self._db.execute("PRAGMA synchronous=NORMAL")
+                self._db.executescript(_SCHEMA)
+            except (OSError, sqlite3.Error) as e:
+                logger.error(f"Disk cache {self.name} unavailable, using memory only: {str(e)}")
+                self._db = None
+        return self._db
+
+    def _disk_get(self, key: str, now: float) -> Optional[Tuple[float, Optional[int], Any]]:
+        if self._connection() is None:
+            return None
+        try:
+            row = self._db.execute(
+                "SELECT expires_at, cycle, value FROM entries WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                return None
+            if row[0] <= now:
+                self._db.execute("DELETE FROM entries WHERE key = ?", (key,))
+                return None
+            self._db.execute("UPDATE entries SET accessed_at = ? WHERE key = ?", (now, key))
+            return row[0], row[1], _loads(row[2])
+        except (sqlite3.Error, ValueError, zlib.error) as e:
+            logger.error(f"Disk cache {self.name} read failed for {key}: {str(e)}")
+            return None
+
+    def _disk_set(self, key: str, value: Any, cycle: Optional[int], expires_at: float, now: float) -> None:
+        if self._connection() is None:
+            return
+        try:
+            blob = _dumps(value)
+            self._db.execute(
+                "INSERT OR REPLACE INTO entries (key, cycle, expires_at, accessed_at, size, value) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (key, cycle, expires_at, now, len(blob), blob),
+            )
+            self._disk_evict(now)
+        except (sqlite3.Error, TypeError, ValueError) as e:
+            logger.error(f"Disk cache {self.name} write failed for {key}: {str(e)}")
+
+    def _disk_evict(self, now: float) -> None:
+        # Expired entries go first, then the least recently used ones until the
+        # store fits in max_disk_bytes again.
+        self._db.execute("DELETE FROM entries WHERE expires_at <= ?", (now,))
+        self._db.execute(
+            "DELETE FROM entries WHERE key IN ("
+            " SELECT key FROM ("
+            "  SELECT key, SUM(size) OVER (ORDER BY accessed_at DESC, key) AS running FROM entries"
+            " ) WHERE running > ?"
+            ")",
+            (self.max_disk_bytes,),
+        )
+
+    def _disk_swap_cycle(self, cycle: int) -> Optional[int]:
+        """Store the new cycle on disk, purge stale rows, and return the old one."""
+        if self._connection() is None:
+            return None
+        try:
+            self._db.execute("BEGIN IMMEDIATE")
+            try:
+                row = self._db.execute("SELECT value FROM meta WHERE name = 'cycle'").fetchone()
+                stored = int(row[0]) if row is not None else None
+                if stored is not None and stored != cycle:
+                    self._db.execute(
+                        "DELETE FROM entries WHERE cycle IS NULL OR cycle >= ?", (stored,)
+                    )
+                self._db.execute(
+                    "INSERT OR REPLACE INTO meta (name, value) VALUES ('cycle', ?)", (str(cycle),)
+                )
+                self._db.execute("COMMIT")
+            except sqlite3.Error:
+                self._db.execute("ROLLBACK")
+                raise
+            return stored
+        except sqlite3.Error as e:
+            logger.error(f"Disk cache {self.name} cycle update failed: {str(e)}")
+            return None
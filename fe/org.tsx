@@ -1,6 +1,6 @@
 // src/hooks > TS useOrgSetup.ts > © GetOrgSetupDataHookParams > sortType
 // use-client
-import { useCallback, useMemo, useState, useEffect } from 'react';
+import { useCallback, useMemo, useRef, useState, useEffect } from 'react';
 import { getCoreRowModel, getPaginationRowModel, useReactTable } from '@tanstack/react-table';
 import membersColumns from '@components/Opportunities/MembersList/Columns';
 import constants, { filterTypes, leadStatuses, sortTypes } from '@constants';
@@ -14,7 +14,7 @@ import type { UseQueryResult } from '@tanstack/react-query';
 import type { ColumnFilter, PaginationState, SortingState, Table } from '@tanstack/react-table';
 import type { GetMembersExpandedOutput, GetOrgSetupFinalOutput, GetOrgSetupOutput, GetOrgSetupDataHookParams } from '@features/members/members.type';
 import { table } from 'console';
-import { all } from 'axios';
+import axios, { all } from 'axios';
 import { FilterData, useFilterStore } from '@store/useFilterStore';
 
 export interface GetOrgSetupOutput {
@@ -39,6 +39,16 @@ export interface OrgSetupHookOutput {
 
 export type OrgSetupHook = () => OrgSetupHookOutput;
 
+// Stable per-browser id sent as X-User-Id so the org-setup audit log can tell users apart
+const getAuditUserId = (): string => {
+  let userId = localStorage.getItem('auditUserId');
+  if (!userId) {
+    userId = crypto.randomUUID();
+    localStorage.setItem('auditUserId', userId);
+  }
+  return userId;
+};
+
 export const useOrgSetup: OrgSetupHook = () => {
   const [allData, setAllData] = useState<GetOrgSetupOutput[]>([]);
   const [lastCursor, setLastCursor] = useState<{ last_dx_cycle: string; last_org_log: string; } | undefined>(undefined);
@@ -64,6 +74,36 @@ export const useOrgSetup: OrgSetupHook = () => {
     }
   }, [currentFiltersApplied]);
 
+  const filtersRef = useRef(currentFiltersApplied);
+  filtersRef.current = currentFiltersApplied;
+
+  useEffect(() => {
+    const interceptor = axios.interceptors.request.use((config) => {
+      if (config.url?.includes('/api/org-setup')) {
+        config.headers.set('X-User-Id', getAuditUserId());
+      }
+      return config;
+    });
+    return () => axios.interceptors.request.eject(interceptor);
+  }, []);
+
+  // Server-sent invalidations: a new cycle drops the loaded pages, a refreshed
+  // filter list only needs the counts recomputed.
+  useEffect(() => {
+    const source = new EventSource('https://vbc-dtxp-review-tool-api.hcb-dev.aig.aetna.com/api/events/stream');
+    source.addEventListener('cycle', () => {
+      setAllData([]);
+      setLastCursor(undefined);
+      setPagination((prev) => ({ ...prev, pageIndex: 0 }));
+      membersDataHookData.refetch();
+      fetchFilteredFilesCount(filtersRef.current);
+    });
+    source.addEventListener('filters', () => {
+      fetchFilteredFilesCount(filtersRef.current);
+    });
+    return () => source.close();
+  }, []);
+
   useEffect(() => {
     if (newData?.length > 0) {
       setAllData((prev) => [...prev, ...newData]);